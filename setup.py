@@ -7,7 +7,9 @@ setup(
         "util",
         "simple_web_crawl",
         "table_unspanner",
+        "unspanned_table_markdown",
         "test_removing_javascript",
+        "test_inline_unspanned_tables",
     ],
     install_requires=[
         "Crawl4AI==0.7.7",
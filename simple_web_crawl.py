@@ -11,9 +11,14 @@ import argparse
 from pathlib import Path
 from dotenv import load_dotenv
 from table_unspanner import TableUnspanner
+from unspanned_table_markdown import SpanKeepingScrapingStrategy, UnspannedTableMarkdownGenerator
 
 load_dotenv()
 
+# trueの場合、colspan, rowspanを含むテーブルをマークダウン内でunspanしたテーブルに置き換える。
+# falseの場合は従来通り_unspanned_tables.mdを別途出力する。
+INLINE_UNSPANNED_TABLES = os.getenv("INLINE_UNSPANNED_TABLES", "false").lower() == "true"
+
 # crawler = AsyncWebCrawler()
 
 config = CrawlerRunConfig(
@@ -42,6 +47,11 @@ config = CrawlerRunConfig(
     exclude_external_images=False,
 )
 
+if INLINE_UNSPANNED_TABLES:
+    # cleaned_htmlにcolspan, rowspanを残し、マークダウン生成時にテーブルをunspanする
+    config.scraping_strategy = SpanKeepingScrapingStrategy()
+    config.markdown_generator = UnspannedTableMarkdownGenerator()
+
 
 
 def fix_multiline_table_cells(markdown_text: str) -> str:
@@ -173,18 +183,20 @@ async def crawl(input_file='urls.txt', output_dir='output_crawled'):
                         # )
                     )
                 # Unspan tables
-                unspanner = TableUnspanner(result.html)
-                result_list = []
-                # Get all tables as markdown
-                all_tables = unspanner.get_all_tables()
-                for i, table in enumerate(all_tables):
-                    markdown = unspanner.to_markdown_compact(table_index=i, header_row=0)
-                    result_list.append(f"Table {i+1}:\n{markdown}\n\n\n\n")            
-
-                # mdディレクトリへマークダウンを保存
-                if len(result_list) > 0:
-                    with open("{}/md/{}".format(output_dir, url2fname(url) + "_unspanned_tables.md"), "w", encoding="utf-8") as file:
-                        file.write(''.join(result_list))
+                # INLINE_UNSPANNED_TABLESの場合は、マークダウン生成時に置換済みのため出力しない
+                if not INLINE_UNSPANNED_TABLES:
+                    unspanner = TableUnspanner(result.html)
+                    result_list = []
+                    # Get all tables as markdown
+                    all_tables = unspanner.get_all_tables()
+                    for j, table in enumerate(all_tables):
+                        markdown = unspanner.grid_to_markdown_compact(table, header_row=0)
+                        result_list.append(f"Table {j+1}:\n{markdown}\n\n\n\n")
+
+                    # mdディレクトリへマークダウンを保存
+                    if len(result_list) > 0:
+                        with open("{}/md/{}".format(output_dir, url2fname(url) + "_unspanned_tables.md"), "w", encoding="utf-8") as file:
+                            file.write(''.join(result_list))
 
                 # 出力ディレクトリ直下へcleaned HTML and JSONを保存
                 if os.getenv("EXCUDE_CLEANED_HTML", "false").lower() == "true":
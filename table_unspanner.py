@@ -4,10 +4,16 @@ Compatible with Crawl4AI output
 """
 
 import asyncio
+import re
 from bs4 import BeautifulSoup
 import pandas as pd
 
 
+# html2textでエスケープされないよう英数字のみで構成する
+TABLE_PLACEHOLDER = "CRAWLTABLEPLACEHOLDER{}END"
+TABLE_PLACEHOLDER_PATTERN = re.compile(r"CRAWLTABLEPLACEHOLDER(\d+)END")
+
+
 class TableUnspanner:
     """
     Unspans HTML tables with rowspan and colspan attributes
@@ -24,6 +30,57 @@ class TableUnspanner:
         self.html_content = html_content
         self.soup = BeautifulSoup(html_content, 'html.parser')
     
+    @staticmethod
+    def get_rows(table):
+        """
+        Get the rows of a table without descending into nested tables
+        
+        Args:
+            table: BeautifulSoup table element
+            
+        Returns:
+            List of tr elements in document order
+        """
+        rows = []
+        for child in table.find_all(['tr', 'thead', 'tbody', 'tfoot'], recursive=False):
+            if child.name == 'tr':
+                rows.append(child)
+            else:
+                rows.extend(child.find_all('tr', recursive=False))
+        return rows
+    
+    @staticmethod
+    def get_span(cell, name):
+        """
+        Get the colspan or rowspan of a cell. Malformed values such as
+        "2;" are read from their leading digits, otherwise 1 is returned.
+        
+        Args:
+            cell: BeautifulSoup td or th element
+            name: 'colspan' or 'rowspan'
+            
+        Returns:
+            Span as int (1 or more)
+        """
+        match = re.match(r'\s*(\d+)', cell.get(name) or '')
+        return max(int(match.group(1)), 1) if match else 1
+    
+    def has_spans(self, table):
+        """
+        Check whether a table uses colspan or rowspan (nested tables are not checked)
+        
+        Args:
+            table: BeautifulSoup table element
+            
+        Returns:
+            True if one of the table's own cells spans more than one row or column
+        """
+        return any(
+            self.get_span(cell, 'colspan') > 1 or self.get_span(cell, 'rowspan') > 1
+            for row in self.get_rows(table)
+            for cell in row.find_all(['td', 'th'], recursive=False)
+        )
+    
     def unspan_table(self, table):
         """
         Unspan a single HTML table element
@@ -34,37 +91,37 @@ class TableUnspanner:
         Returns:
             2D list representing the unspanned table grid
         """
-        rows = table.find_all('tr')
+        rows = self.get_rows(table)
         
         # Determine number of columns from colgroup if exists, else calculate
-        colgroup = table.find('colgroup')
+        colgroup = table.find('colgroup', recursive=False)
         if colgroup:
             max_cols = len(colgroup.find_all('col'))
         else:
             # Calculate from first row
-            max_cols = sum(int(cell.get('colspan', 1)) 
-                          for cell in rows[0].find_all(['td', 'th']))
+            max_cols = sum(self.get_span(cell, 'colspan')
+                          for cell in rows[0].find_all(['td', 'th'], recursive=False))
         
         total_rows = len(rows)
         
-        # Initialize grid
-        grid = [['' for _ in range(max_cols)] for _ in range(total_rows)]
+        # Initialize grid (None marks a slot not yet filled, so empty cells keep their place)
+        grid = [[None for _ in range(max_cols)] for _ in range(total_rows)]
         
         # Fill the grid
         for row_idx, row in enumerate(rows):
             col_idx = 0
             
-            for cell in row.find_all(['td', 'th']):
+            for cell in row.find_all(['td', 'th'], recursive=False):
                 # Find next available column
-                while col_idx < max_cols and grid[row_idx][col_idx] != '':
+                while col_idx < max_cols and grid[row_idx][col_idx] is not None:
                     col_idx += 1
                 
                 if col_idx >= max_cols:
                     break
                 
                 # Get cell attributes
-                rowspan = int(cell.get('rowspan', 1))
-                colspan = int(cell.get('colspan', 1))
+                rowspan = self.get_span(cell, 'rowspan')
+                colspan = self.get_span(cell, 'colspan')
                 
                 # Clean cell text
                 text = cell.get_text(separator=' ', strip=True)
@@ -75,8 +132,10 @@ class TableUnspanner:
                     for c in range(colspan):
                         if row_idx + r < total_rows and col_idx + c < max_cols:
                             grid[row_idx + r][col_idx + c] = text
+                
+                col_idx += colspan
         
-        return grid
+        return [['' if cell is None else cell for cell in row] for row in grid]
     
     def get_all_tables(self):
         """
@@ -150,8 +209,21 @@ class TableUnspanner:
         if table_index >= len(tables):
             raise IndexError(f"Table index {table_index} out of range. Found {len(tables)} tables.")
         
-        grid = tables[table_index]
+        return self.grid_to_markdown_compact(tables[table_index], header_row, custom_headers)
+    
+    @staticmethod
+    def grid_to_markdown_compact(grid, header_row=0, custom_headers=None):
+        """
+        Convert an unspanned table grid to compact markdown format
         
+        Args:
+            grid: 2D list returned by unspan_table
+            header_row: Row index to use as column headers
+            custom_headers: Optional list of custom header names to override
+            
+        Returns:
+            Compact markdown formatted string
+        """
         # Get headers and data
         if header_row is not None and len(grid) > header_row:
             headers = grid[header_row]
@@ -183,6 +255,36 @@ class TableUnspanner:
         
         return '\n'.join(lines)
     
+    @staticmethod
+    def grid_to_markdown(grid, header_row=0):
+        """
+        Convert an unspanned table grid to markdown format for embedding
+        in the page markdown. Unlike grid_to_markdown_compact, whitespace
+        is collapsed instead of removed and '|' in cells is escaped.
+        
+        Args:
+            grid: 2D list returned by unspan_table
+            header_row: Row index to use as column headers
+            
+        Returns:
+            Markdown formatted string
+        """
+        def format_row(row):
+            cells = [' '.join(cell.split()).replace('|', '\\|') for cell in row]
+            return '| ' + ' | '.join(cells) + ' |'
+        
+        if header_row is not None and len(grid) > header_row:
+            headers = grid[header_row]
+            data = grid[header_row + 1:]
+        else:
+            headers = [f"Col{i}" for i in range(len(grid[0]))]
+            data = grid
+        
+        lines = [format_row(headers), '|' + '|'.join([':---' for _ in headers]) + '|']
+        lines.extend(format_row(row) for row in data)
+        
+        return '\n'.join(lines)
+    
     def to_csv(self, table_index=0, header_row=0):
         """
         Convert a table to CSV format
@@ -196,6 +298,41 @@ class TableUnspanner:
         """
         df = self.to_dataframe(table_index, header_row)
         return df.to_csv(index=False)
+    
+    def replace_tables_with_placeholders(self, header_row=0):
+        """
+        Replace each top-level table that uses colspan or rowspan with a
+        placeholder paragraph and render the unspanned table as markdown
+        in the same pass.
+        Tables without spans, which Crawl4AI renders correctly (with links),
+        and tables that contain or are nested in another table (e.g. layout
+        tables) are left as is for Crawl4AI.
+        
+        Note: self.soup is modified in place, and the HTML of the replaced
+        tables is kept in self.replaced_tables (indexed by placeholder number).
+        
+        Args:
+            header_row: Row index to use as column headers
+            
+        Returns:
+            Tuple of (HTML string with placeholders, list of markdown tables
+            indexed by placeholder number)
+        """
+        markdown_tables = []
+        self.replaced_tables = []
+        for table in self.soup.find_all('table'):
+            if (table.find_parent('table') is not None
+                    or table.find('table') is not None
+                    or not self.has_spans(table)):
+                continue
+            grid = self.unspan_table(table)
+            self.replaced_tables.append(str(table))
+            placeholder = self.soup.new_tag('p')
+            placeholder.string = TABLE_PLACEHOLDER.format(len(markdown_tables))
+            table.replace_with(placeholder)
+            markdown_tables.append(self.grid_to_markdown(grid, header_row))
+        
+        return str(self.soup), markdown_tables
 
 
 # Example usage with Crawl4AI
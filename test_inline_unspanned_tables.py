@@ -0,0 +1,174 @@
+import asyncio
+import json
+import simple_web_crawl
+from table_unspanner import TableUnspanner
+from unspanned_table_markdown import SpanKeepingScrapingStrategy, UnspannedTableMarkdownGenerator, splice_tables
+from crawl4ai.content_filter_strategy import PruningContentFilter
+from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
+
+spanned_table = """
+<table>
+<tr><th colspan="2">Basic charge</th><th>Price</th></tr>
+<tr><td rowspan="2">Energy</td><td>Day</td><td>31 | 80</td></tr>
+<tr><td>Night</td><td>28</td></tr>
+</table>
+"""
+
+spanned_markdown = """| Basic charge | Basic charge | Price |
+|:---|:---|:---|
+| Energy | Day | 31 \\| 80 |
+| Energy | Night | 28 |"""
+
+
+def test_replace_tables_with_placeholders():
+    html, markdown_tables = TableUnspanner(f"<p>Intro</p>{spanned_table}").replace_tables_with_placeholders()
+    assert "<table" not in html
+    assert "CRAWLTABLEPLACEHOLDER0END" in html
+    assert markdown_tables == [spanned_markdown]
+
+
+def test_splice_spanned_table():
+    markdown = UnspannedTableMarkdownGenerator().generate_markdown(
+        f"<p>Intro</p>{spanned_table}<p>Outro</p>"
+    ).raw_markdown
+    assert spanned_markdown in markdown
+    assert markdown.index("Intro") < markdown.index(spanned_markdown) < markdown.index("Outro")
+    assert "CRAWLTABLEPLACEHOLDER" not in markdown
+
+
+def test_nested_table_is_left_to_crawl4ai():
+    html = """
+    <table><tr>
+    <td><h2>Menu</h2><a href="https://example.com/one">Link one</a></td>
+    <td><table><tr><td>A</td><td>B</td></tr><tr><td>1</td><td>2</td></tr></table></td>
+    </tr></table>
+    """
+    html_with_placeholders, markdown_tables = TableUnspanner(html).replace_tables_with_placeholders()
+    assert markdown_tables == []
+    assert "CRAWLTABLEPLACEHOLDER" not in html_with_placeholders
+
+    markdown = UnspannedTableMarkdownGenerator().generate_markdown(html).raw_markdown
+    assert "## Menu" in markdown
+    assert "[Link one](https://example.com/one)" in markdown
+
+
+def test_table_in_list_item():
+    markdown = UnspannedTableMarkdownGenerator().generate_markdown(
+        f"<ul><li>Item one</li><li>{spanned_table}</li></ul>"
+    ).raw_markdown
+    lines = markdown.split("\n")
+    first = lines.index("  * | Basic charge | Basic charge | Price |")
+    assert lines[first - 2:first] == ["  * Item one", ""]
+    assert lines[first + 1:first + 4] == [
+        "    |:---|:---|:---|",
+        "    | Energy | Day | 31 \\| 80 |",
+        "    | Energy | Night | 28 |",
+    ]
+
+
+def test_splice_unknown_placeholder_is_unchanged():
+    markdown = "Text CRAWLTABLEPLACEHOLDER5END text\n\nCRAWLTABLEPLACEHOLDER0END\n"
+    assert splice_tables(markdown, ["|a|\n|:---|"]) == "Text CRAWLTABLEPLACEHOLDER5END text\n\n|a|\n|:---|\n"
+
+
+def test_page_without_tables_is_unchanged():
+    html = '<h1>Title</h1><p>Text with <a href="https://example.com/">a link</a></p><ul><li>Item</li></ul>'
+    result = UnspannedTableMarkdownGenerator().generate_markdown(html)
+    expected = DefaultMarkdownGenerator().generate_markdown(html)
+    assert result.raw_markdown == expected.raw_markdown
+    assert result.markdown_with_citations == expected.markdown_with_citations
+
+
+class FakeResult:
+    def __init__(self, url):
+        self.url = url
+        self.html = f"<html><body>{spanned_table}</body></html>"
+        self.markdown = "Basic charge | Price\n---|---\n"
+
+    def model_dump_json(self):
+        return json.dumps({"url": self.url, "metadata": {"title": "Test"}})
+
+
+class FakeCrawler:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def arun(self, url, **kwargs):
+        return FakeResult(url)
+
+
+def run_crawl(monkeypatch, tmp_path, inline):
+    monkeypatch.setattr(simple_web_crawl, "AsyncWebCrawler", FakeCrawler)
+    monkeypatch.setattr(simple_web_crawl, "INLINE_UNSPANNED_TABLES", inline)
+    monkeypatch.setenv("EXCUDE_CLEANED_HTML", "true")
+    monkeypatch.setenv("EXCUDE_JSON", "true")
+    input_file = tmp_path / "urls.cfg"
+    input_file.write_text("https://example.com/plan.html\n")
+    output_dir = tmp_path / "output"
+    asyncio.run(simple_web_crawl.crawl(input_file=str(input_file), output_dir=str(output_dir)))
+    return output_dir / "md"
+
+
+def test_crawl_writes_unspanned_tables_file_when_not_inline(monkeypatch, tmp_path):
+    md_dir = run_crawl(monkeypatch, tmp_path, inline=False)
+    assert (md_dir / "example.com_plan.html.md").exists()
+    unspanned = (md_dir / "example.com_plan.html_unspanned_tables.md").read_text(encoding="utf-8")
+    assert unspanned.startswith("Table 1:\n|Basiccharge|Basiccharge|Price|")
+
+
+def test_crawl_skips_unspanned_tables_file_when_inline(monkeypatch, tmp_path):
+    md_dir = run_crawl(monkeypatch, tmp_path, inline=True)
+    assert (md_dir / "example.com_plan.html.md").exists()
+    assert not (md_dir / "example.com_plan.html_unspanned_tables.md").exists()
+
+
+def test_malformed_span_is_read_leniently():
+    html = '<table><tr><th colspan="2;">Plan</th></tr><tr><td>A</td><td>B</td></tr></table>'
+    markdown = UnspannedTableMarkdownGenerator().generate_markdown(html).raw_markdown
+    assert "| Plan | Plan |\n|:---|:---|\n| A | B |" in markdown
+
+
+def test_empty_cells_keep_their_column():
+    html = """
+    <table>
+    <tr><th></th><th colspan="2">Charge</th></tr>
+    <tr><td rowspan="2"></td><td>Day</td><td>31</td></tr>
+    <tr><td>Night</td><td>28</td></tr>
+    </table>
+    """
+    assert TableUnspanner(html).get_all_tables() == [[
+        ['', 'Charge', 'Charge'],
+        ['', 'Day', '31'],
+        ['', 'Night', '28'],
+    ]]
+    scraped = SpanKeepingScrapingStrategy().scrap("https://example.com/", f"<html><body>{html}</body></html>")
+    markdown = UnspannedTableMarkdownGenerator().generate_markdown(scraped.cleaned_html).raw_markdown
+    assert "|  | Charge | Charge |\n|:---|:---|:---|\n|  | Day | 31 |\n|  | Night | 28 |" in markdown
+
+
+def test_table_without_spans_is_left_to_crawl4ai():
+    html = '<table><tr><th>Plan</th><th>Detail</th></tr><tr><td>A</td><td><a href="https://example.com/a">see A</a></td></tr></table>'
+    result = UnspannedTableMarkdownGenerator().generate_markdown(html)
+    expected = DefaultMarkdownGenerator().generate_markdown(html)
+    assert result.raw_markdown == expected.raw_markdown
+    assert "[see A](https://example.com/a)" in result.raw_markdown
+
+
+def test_consecutive_tables_are_separated():
+    markdown = UnspannedTableMarkdownGenerator().generate_markdown(
+        f"{spanned_table}{spanned_table}<p>Outro</p>"
+    ).raw_markdown
+    assert f"{spanned_markdown}\n\n{spanned_markdown}\n\nOutro" in markdown
+
+
+def test_fit_html_has_original_tables():
+    generator = UnspannedTableMarkdownGenerator(content_filter=PruningContentFilter(threshold=0.0))
+    result = generator.generate_markdown(
+        f"<html><body><div><p>Intro paragraph with enough text to keep.</p>{spanned_table}</div></body></html>"
+    )
+    assert "CRAWLTABLEPLACEHOLDER" not in result.fit_html
+    assert '<th colspan="2">Basic charge</th>' in result.fit_html
+    assert spanned_markdown in result.fit_markdown
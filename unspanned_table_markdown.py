@@ -0,0 +1,162 @@
+"""
+Crawl4AI scraping strategy and markdown generator that replace the tables
+with colspan or rowspan in the generated markdown with their unspanned
+markdown (see table_unspanner.py)
+"""
+
+import re
+from crawl4ai.config import IMPORTANT_ATTRS
+from crawl4ai.content_scraping_strategy import LXMLWebScrapingStrategy
+from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
+from crawl4ai.models import MarkdownGenerationResult
+from table_unspanner import TableUnspanner, TABLE_PLACEHOLDER_PATTERN
+
+
+# プレースホルダーの段落(<p>CRAWLTABLEPLACEHOLDERnEND</p>)
+PLACEHOLDER_PARAGRAPH_PATTERN = re.compile(
+    r'(?:<p>\s*)?' + TABLE_PLACEHOLDER_PATTERN.pattern + r'(?:\s*</p>)?'
+)
+# 行頭のblockquote(>)およびリストマーカー(*, -, +, 1.)
+LINE_PREFIX_PATTERN = re.compile(r'[ \t>]*(?:(?:[*+-]|\d+\.)[ \t]+)?')
+
+
+def splice_tables(markdown_text, markdown_tables):
+    """
+    Replace the lines containing table placeholders with the unspanned tables.
+    A leading blockquote or list marker is kept so that the table stays in
+    its context, and the table is separated from the surrounding blocks by
+    empty lines. Placeholders with an unknown index are left unchanged.
+
+    Args:
+        markdown_text: Markdown generated from HTML with placeholders
+        markdown_tables: List of markdown tables indexed by placeholder number
+
+    Returns:
+        Markdown with the unspanned tables spliced in
+    """
+    if not markdown_text or not markdown_tables:
+        return markdown_text
+
+    def is_known(match):
+        return int(match.group(1)) < len(markdown_tables)
+
+    source_lines = markdown_text.split('\n')
+    lines = []
+    for line_idx, line in enumerate(source_lines):
+        matches = [m for m in TABLE_PLACEHOLDER_PATTERN.finditer(line) if is_known(m)]
+        if not matches:
+            lines.append(line)
+            continue
+
+        marker = LINE_PREFIX_PATTERN.match(line).group(0)
+        # 2行目以降は、blockquoteの">"は残し、リストマーカーは同じ幅の空白にする
+        indent = re.sub(r'[^>\s]', ' ', marker)
+        text = TABLE_PLACEHOLDER_PATTERN.sub(
+            lambda m: '' if is_known(m) else m.group(0), line[len(marker):]
+        ).strip()
+        if text:
+            lines.append(marker + text)
+            marker = indent
+
+        # 前後のブロックとつながらないよう、テーブルの前後に空行を入れる
+        blank = indent.rstrip()
+        for match in matches:
+            if lines and lines[-1].strip(' >'):
+                lines.append(blank)
+            table_lines = markdown_tables[int(match.group(1))].split('\n')
+            lines.append(marker + table_lines[0])
+            lines.extend(indent + table_line for table_line in table_lines[1:])
+            lines.append(blank)
+            marker = indent
+        if line_idx + 1 < len(source_lines) and not source_lines[line_idx + 1].strip(' >'):
+            lines.pop()
+
+    return '\n'.join(lines)
+
+
+def restore_tables(html, table_html):
+    """
+    Replace the placeholder paragraphs in HTML with the original tables
+
+    Args:
+        html: HTML generated from HTML with placeholders (e.g. fit_html)
+        table_html: List of original table HTML indexed by placeholder number
+
+    Returns:
+        HTML with the original tables restored
+    """
+    if not html or not table_html:
+        return html
+    return PLACEHOLDER_PARAGRAPH_PATTERN.sub(
+        lambda m: table_html[int(m.group(1))] if int(m.group(1)) < len(table_html) else m.group(0),
+        html,
+    )
+
+
+class SpanKeepingScrapingStrategy(LXMLWebScrapingStrategy):
+    """
+    LXMLWebScrapingStrategy that keeps colspan and rowspan in cleaned_html
+    so that UnspannedTableMarkdownGenerator can unspan the tables.
+    CrawlerRunConfig(keep_attrs=...) is not applied by LXMLWebScrapingStrategy
+    (Crawl4AI 0.7.7), so the attributes are added here.
+    """
+
+    def remove_unwanted_attributes_fast(self, root, important_attrs=None, keep_data_attributes=False):
+        important_attrs = set(important_attrs or IMPORTANT_ATTRS) | {"colspan", "rowspan"}
+        return super().remove_unwanted_attributes_fast(
+            root, important_attrs=important_attrs, keep_data_attributes=keep_data_attributes
+        )
+
+
+class UnspannedTableMarkdownGenerator(DefaultMarkdownGenerator):
+    """
+    Markdown generator for Crawl4AI that replaces the tables with colspan or
+    rowspan in the generated markdown with their unspanned markdown.
+    Pages with tables are parsed by TableUnspanner, which unspans the tables
+    and swaps them for placeholders; Crawl4AI renders the rest and the
+    placeholders are then replaced. Pages without tables are passed through.
+
+    Usage:
+        CrawlerRunConfig(markdown_generator=UnspannedTableMarkdownGenerator(), ...)
+    """
+
+    def __init__(self, *args, header_row=0, **kwargs):
+        """
+        Args:
+            header_row: Row index to use as column headers
+            Other arguments are passed to DefaultMarkdownGenerator
+        """
+        super().__init__(*args, **kwargs)
+        self.header_row = header_row
+
+    def generate_markdown(self, input_html, *args, **kwargs):
+        """
+        Generate markdown with the unspanned tables spliced in
+
+        Returns:
+            MarkdownGenerationResult
+        """
+        # テーブルがないページはTableUnspannerでパースしない
+        if not input_html or '<table' not in input_html.lower():
+            return super().generate_markdown(input_html, *args, **kwargs)
+
+        try:
+            unspanner = TableUnspanner(input_html)
+            html, markdown_tables = unspanner.replace_tables_with_placeholders(
+                header_row=self.header_row
+            )
+        except Exception as e:
+            # unspanできない場合はCrawl4AIの変換結果のまま出力し、クロールを止めない
+            print(f"Error unspanning tables, using Crawl4AI markdown: {e}")
+            return super().generate_markdown(input_html, *args, **kwargs)
+        if not markdown_tables:
+            return super().generate_markdown(input_html, *args, **kwargs)
+
+        result = super().generate_markdown(html, *args, **kwargs)
+        return MarkdownGenerationResult(
+            raw_markdown=splice_tables(result.raw_markdown, markdown_tables),
+            markdown_with_citations=splice_tables(result.markdown_with_citations, markdown_tables),
+            references_markdown=result.references_markdown,
+            fit_markdown=splice_tables(result.fit_markdown, markdown_tables),
+            fit_html=restore_tables(result.fit_html, unspanner.replaced_tables),
+        )